@@ -1,31 +1,120 @@
 import sqlite3
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import jwt
 import time
 import contextlib
-from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import ThreadPoolExecutor, as_completed
 import streamlit as st
 import base64
 import os
+import hashlib
+import threading
+import queue
 import traceback
+import logging
+import functools
+import contextvars
+import json
+try:
+    import orjson
+    json_loads, json_dumps = orjson.loads, orjson.dumps
+except ImportError:  # orjson is optional; the stdlib parser gives identical results, just slower
+    json_loads, json_dumps = json.loads, lambda obj: json.dumps(obj).encode()
+from cryptography.hazmat.primitives.serialization import load_pem_private_key
+
+# Per-request chatter goes through logging at DEBUG so it costs nothing unless enabled
+log = logging.getLogger(__name__)
+logging.basicConfig(level=os.environ.get("LOG_LEVEL", "INFO"), format="%(asctime)s %(levelname)s %(message)s")
+logging.getLogger("urllib3").setLevel(logging.WARNING)  # retries and pool chatter stay quiet even at DEBUG
+
+# -------------------------------
+# HTTP Sessions
+# -------------------------------
+def make_session(pool_maxsize, allowed_methods=Retry.DEFAULT_ALLOWED_METHODS):
+    """Keep-alive session that retries idempotent calls on 429/5xx and returns the last response to the caller."""
+    session = requests.Session()
+    # 524 is the gateway timeout App Store Connect returns when an attribute PATCH stalls
+    retry = Retry(total=5, backoff_factor=0.5, status_forcelist=[429, 500, 502, 503, 504, 524],
+                  allowed_methods=allowed_methods, respect_retry_after_header=True, raise_on_status=False)
+    session.mount("https://", HTTPAdapter(pool_connections=4, pool_maxsize=pool_maxsize, max_retries=retry))
+    return session
+
+# (connect, read) timeouts so a stalled socket fails over to the retry policy instead of hanging a worker
+ASC_TIMEOUT = (5, 30)
+GITHUB_TIMEOUT = (5, 120)  # the DB upload/download bodies can be large
+
+# One pool per API so App Store Connect and GitHub calls skip the TCP/TLS handshake after the first
+# Attribute PATCHes set absolute values, so replaying one after a 5xx is safe.
+# 64 = APP_WORKERS apps x SCREENSHOT_WORKERS listings in flight during a full store sync; a smaller
+# pool would discard (and later re-handshake) the surplus connections.
+asc_session = make_session(64, Retry.DEFAULT_ALLOWED_METHODS | {"PATCH"})
+asc_session.headers["Accept"] = "application/json"
+github_session = make_session(4)
+
+def error_snippet(response, limit=500):
+    """First `limit` bytes of an error body, decoded leniently instead of decoding the whole payload."""
+    return response.content[:limit].decode("utf-8", "replace")
+
+def read_db_meta(db_path):
+    """ETag / blob SHA / content digest recorded for the local DB copy when it last matched GitHub."""
+    try:
+        with open(db_path + ".meta") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def write_db_meta(db_path, etag, sha, digest):
+    with open(db_path + ".meta", "w") as f:
+        json.dump({"etag": etag, "sha": sha, "digest": digest}, f)
+
+def checkpoint_db(db_path):
+    """Folds the WAL back into the main file; False when readers/writers kept part of it back."""
+    with contextlib.closing(sqlite3.connect(db_path, timeout=30)) as conn:
+        busy, log_frames, checkpointed = conn.execute("PRAGMA wal_checkpoint(TRUNCATE)").fetchone()
+    return not busy and checkpointed == log_frames
 
 def load_db_from_github():
     """Downloads the latest database file from GitHub repo."""
+    global _last_sha
     token = st.secrets["GITHUB_TOKEN"]
     repo = st.secrets["REPO"]
     db_path = st.secrets["DB_PATH"]
     api_url = f"https://api.github.com/repos/{repo}/contents/{db_path}"
 
+    local_exists = os.path.exists(db_path)
+    # The file on disk only holds every commit once the WAL is folded in; if that is blocked the DB is
+    # in use, and neither comparing nor replacing it is safe
+    if local_exists and not checkpoint_db(db_path):
+        print("⚠️ DB is in use (WAL checkpoint incomplete) – skip download.")
+        return
+
     headers = {"Authorization": f"token {token}"}
-    res = requests.get(api_url, headers=headers)
+    meta = read_db_meta(db_path)
+    local_matches = local_exists and meta.get("digest") is not None and hash_file(db_path) == meta["digest"]
+    if local_matches and meta.get("etag"):
+        headers["If-None-Match"] = meta["etag"]
+    res = github_session.get(api_url, headers=headers, timeout=GITHUB_TIMEOUT)
+
+    # Unchanged on GitHub and we still hold that copy: skip the (large) binary download
+    if res.status_code == 304 or (
+        res.status_code == 200 and local_matches and meta.get("sha") and res.json().get("sha") == meta["sha"]
+    ):
+        _last_sha = meta.get("sha")
+        print("⏭️ Local DB already matches GitHub – skip download.")
+        return
 
     if res.status_code == 200:
         data = res.json()
         download_url = data.get("download_url")
+        _last_sha = data.get("sha")
+        # Pooled handles would keep reading the replaced file
+        close_pooled_connections()
 
         if download_url:
             # ✅ Safest way: download raw binary directly
-            file_data = requests.get(download_url)
+            file_data = github_session.get(download_url, timeout=GITHUB_TIMEOUT)
             with open(db_path, "wb") as f:
                 f.write(file_data.content)
             print(f"✅ Loaded latest database ({len(file_data.content)} bytes) from GitHub.")
@@ -36,9 +125,52 @@ def load_db_from_github():
                 f.write(content)
             print("✅ Loaded DB via Base64 fallback.")
     else:
-        print(f"⚠️ Could not load DB from GitHub: {res.text}")
+        print(f"⚠️ Could not load DB from GitHub: {error_snippet(res)}")
+        return
+
+    # The checkpoint above truncated the WAL, so nothing from the old file is replayed onto the new one
+    write_db_meta(db_path, res.headers.get("ETag"), _last_sha, hash_file(db_path))
+
+DB_READ_CHUNK = 57 * 1024  # multiple of 3, so per-chunk base64 concatenates without padding
+
+def hash_file(path):
+    digest = hashlib.blake2b()
+    with open(path, "rb") as f:
+        while chunk := f.read(DB_READ_CHUNK):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def base64_file(path):
+    """Base64 of a file, encoded chunk by chunk so the raw bytes are never held whole."""
+    parts = []
+    with open(path, "rb") as f:
+        while chunk := f.read(DB_READ_CHUNK):
+            parts.append(base64.b64encode(chunk))
+    return b"".join(parts).decode()
+
+_github_lock = threading.Lock()
+_last_synced_digest = None  # blake2b of the file last pushed, to skip no-op uploads
+_last_sha = None  # blob SHA of the remote DB as of our last download/upload
+
+def fetch_remote_sha(api_url, headers):
+    """(ok, sha) for the file on GitHub; sha is None when it does not exist yet."""
+    get_res = github_session.get(api_url, headers=headers, timeout=GITHUB_TIMEOUT)
+    if get_res.status_code == 200:
+        print("🔁 Latest SHA fetched for update.")
+        return True, get_res.json().get("sha")
+    if get_res.status_code == 404:
+        print("🆕 No file yet – creating new.")
+        return True, None
+    print(f"❌ SHA fetch failed: {error_snippet(get_res)}")
+    return False, None
 
 def sync_db_to_github():
+    # Concurrent pushes would race on the file SHA and fail with 409
+    with _github_lock:
+        _sync_db_to_github()
+
+def _sync_db_to_github():
+    global _last_synced_digest, _last_sha
     token = st.secrets["GITHUB_TOKEN"]
     repo = st.secrets["REPO"]
     db_path = st.secrets["DB_PATH"]
@@ -53,20 +185,30 @@ def sync_db_to_github():
         print(f"⚠️ DB empty/missing – skip sync.")
         return
 
-    with open(db_path, "rb") as f:
-        content = base64.b64encode(f.read()).decode()
+    # Fold the WAL back into the main file so the uploaded copy has every commit; a partial
+    # checkpoint would push a stale copy
+    if not checkpoint_db(db_path):
+        print("⏳ WAL checkpoint incomplete – retrying sync later.")
+        schedule_db_sync()
+        return
 
-    # ALWAYS fetch latest SHA before PUT (to avoid 409)
-    get_res = requests.get(api_url, headers=headers)
-    sha = None
-    if get_res.status_code == 200:
-        sha = get_res.json().get("sha")
-        print("🔁 Latest SHA fetched for update.")
-    elif get_res.status_code == 404:
-        print("🆕 No file yet – creating new.")
-    else:
-        print(f"❌ SHA fetch failed: {get_res.text}")
+    digest = hash_file(db_path)
+    if digest == _last_synced_digest:
+        print("⏭️ DB unchanged since last sync – skip upload.")
         return
+    content = base64_file(db_path)
+
+    # Reuse the SHA from our last download/upload (or the .meta sidecar after a restart); only ask
+    # GitHub when we have none or it went stale
+    if _last_sha is None:
+        _last_sha = read_db_meta(db_path).get("sha")
+    sha = _last_sha
+    if sha is None:
+        ok, sha = fetch_remote_sha(api_url, headers)
+        if not ok:
+            return
+        # Keep it even if the PUT below fails, so the next attempt does not GET again
+        _last_sha = sha
 
     data = {
         "message": "Auto-sync database update",
@@ -76,12 +218,46 @@ def sync_db_to_github():
     if sha:
         data["sha"] = sha
 
-    res = requests.put(api_url, headers=headers, json=data)
+    res = github_session.put(api_url, headers=headers, json=data, timeout=GITHUB_TIMEOUT)
+    if res.status_code in [409, 422] and _last_sha is not None:
+        # Someone else pushed since our cached SHA: refetch it and retry once
+        ok, sha = fetch_remote_sha(api_url, headers)
+        if not ok:
+            return
+        _last_sha = sha
+        data.pop("sha", None)
+        if sha:
+            data["sha"] = sha
+        res = github_session.put(api_url, headers=headers, json=data, timeout=GITHUB_TIMEOUT)
     if res.status_code in [200, 201]:
+        _last_synced_digest = digest
+        _last_sha = res.json().get("content", {}).get("sha")
+        write_db_meta(db_path, None, _last_sha, digest)  # the old ETag described the previous blob
         print("✅ DB synced!")
     else:
-        print(f"❌ Sync failed: {res.text}")
+        print(f"❌ Sync failed: {error_snippet(res)}")
+
+# -------------------------------
+# Background GitHub Sync
+# -------------------------------
+SYNC_DEBOUNCE = 5  # seconds to wait for more writes before pushing, so bursts of saves become one commit
+_sync_executor = ThreadPoolExecutor(max_workers=1)
+_sync_pending = threading.Event()
+
+def _run_scheduled_sync():
+    time.sleep(SYNC_DEBOUNCE)
+    _sync_pending.clear()
+    try:
+        sync_db_to_github()
+    except Exception as e:
+        print(f"❌ Background sync failed: {e}\n{traceback.format_exc()}")
 
+def schedule_db_sync():
+    """Pushes the DB to GitHub on a background worker; requests made while one is queued collapse into it."""
+    if _sync_pending.is_set():
+        return
+    _sync_pending.set()
+    _sync_executor.submit(_run_scheduled_sync)
 
 
 # 🔍 Debug check (you can remove later)
@@ -94,7 +270,13 @@ print("GitHub Token starts with:", st.secrets["GITHUB_TOKEN"][:8], "...")
 # Configuration
 # -------------------------------
 BASE_URL = "https://api.appstoreconnect.apple.com/v1"
-REQUEST_DELAY = 0.2  # Delay in seconds between task submissions
+REQUEST_DELAY = 0.2  # Delay in seconds between task submissions once the hourly budget runs low
+RATE_LIMIT_RESERVE = 200  # requests left in the hour below which callers start pacing
+APP_WORKERS = 4  # apps processed concurrently by fetch_and_store_apps
+SCREENSHOT_WORKERS = 16  # concurrent listing GETs while collecting one app's screenshots
+LOCALIZATION_INCLUDE_LIMIT = 50  # Max related localizations embedded per ?include= resource
+JWT_LIFETIME = 20 * 60  # Apple's maximum token lifetime
+JWT_REFRESH_MARGIN = 60  # Re-sign this many seconds before expiry
 
 # -------------------------------
 # Attribute Name Mapping
@@ -112,14 +294,98 @@ ATTRIBUTE_MAPPING = {
     'promotional_text': 'promotionalText'
 }
 
+def to_api_attributes(attributes, _lookup=ATTRIBUTE_MAPPING.get):
+    """snake_case DB attributes -> camelCase API attributes, dropping None values."""
+    if len(attributes) == 1:
+        # Saves patch one attribute at a time; skip building the comprehension for that case
+        (k, v), = attributes.items()
+        return {} if v is None else {_lookup(k, k): v}
+    return {_lookup(k, k): v for k, v in attributes.items() if v is not None}
+
 # -------------------------------
 # Database Connection
 # -------------------------------
+DB_PRAGMAS = (
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA busy_timeout=30000",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA cache_size=-20000",
+    "PRAGMA mmap_size=268435456",  # reads map the file instead of copying pages through the page cache
+)
+_wal_enabled = False
+
+def configure_connection(conn):
+    """Switches the DB to WAL once per process (it persists in the file) and applies per-connection PRAGMAs."""
+    global _wal_enabled
+    if not _wal_enabled:
+        conn.execute("PRAGMA journal_mode=WAL")
+        _wal_enabled = True
+    for pragma in DB_PRAGMAS:
+        conn.execute(pragma)
+    return conn
+
+# Bulk-write statements, built once at import so every call hands sqlite3 the identical (cached) SQL string
+TABLE_COLUMNS = {
+    "app_info_localizations": (
+        "localization_id", "app_id", "store_id", "locale",
+        "name", "subtitle", "privacy_policy_url", "privacy_choices_url"
+    ),
+    "app_versions": ("version_id", "app_id", "store_id", "platform"),
+    "app_version_localizations": (
+        "localization_id", "version_id", "app_id", "store_id", "locale", "description", "keywords",
+        "marketing_url", "promotional_text", "support_url", "whats_new", "platform"
+    ),
+}
+# API attribute keys, in the same order as the attribute columns above
+APP_INFO_LOC_FIELDS = ("locale", "name", "subtitle", "privacyPolicyUrl", "privacyChoicesUrl")
+VERSION_LOC_FIELDS = ("locale", "description", "keywords", "marketingUrl", "promotionalText", "supportUrl", "whatsNew")
+
+def upsert_clause(columns):
+    """ON CONFLICT on the leading primary-key column: updates in place instead of REPLACE's delete + insert."""
+    return f" ON CONFLICT({columns[0]}) DO UPDATE SET " + ", ".join(f"{c} = excluded.{c}" for c in columns[1:])
+
+INSERT_SQL = {
+    table: f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))})" + upsert_clause(columns)
+    for table, columns in TABLE_COLUMNS.items()
+}
+SCREENSHOT_COLUMNS = ("id", "app_id", "store_id", "localization_id", "locale", "display_type", "url", "width", "height", "platform")
+INSERT_SCREENSHOT_SQL = (
+    f"INSERT INTO app_screenshots ({', '.join(SCREENSHOT_COLUMNS)}) VALUES ({', '.join('?' * len(SCREENSHOT_COLUMNS))})"
+    + upsert_clause(SCREENSHOT_COLUMNS)
+)
+
+def delete_missing_rows(cursor, table, key_column, keep_ids, scope, params):
+    """After an upsert, deletes the rows in `scope` whose key the API no longer returned.
+
+    The ids go in as one JSON array so the statement never hits SQLite's bound-parameter limit.
+    """
+    cursor.execute(
+        f"DELETE FROM {table} WHERE {scope} AND {key_column} NOT IN (SELECT value FROM json_each(?))",
+        (*params, json.dumps(list(keep_ids)))
+    )
+
+DB_POOL_SIZE = 8
+# SQLite allows one writer at a time; queue writers here instead of holding pooled connections in busy_timeout
+DB_WRITE_LOCK = threading.Lock()
+_db_pool = queue.LifoQueue(maxsize=DB_POOL_SIZE)
+
+def close_pooled_connections():
+    """Closes idle pooled connections (e.g. before the DB file is replaced on disk)."""
+    while True:
+        try:
+            _db_pool.get_nowait().close()
+        except queue.Empty:
+            return
+
 @contextlib.contextmanager
 def get_db_connection():
+    """Borrows a configured connection from the pool (opening one on a miss) and returns it on exit."""
     conn = None
     try:
-        conn = sqlite3.connect("app_store_data.db", timeout=30)
+        try:
+            conn = _db_pool.get_nowait()
+        except queue.Empty:
+            conn = configure_connection(sqlite3.connect("app_store_data.db", timeout=30, check_same_thread=False, cached_statements=256))
         yield conn
     except Exception as e:
         if conn:
@@ -128,7 +394,13 @@ def get_db_connection():
         raise
     finally:
         if conn:
-            conn.close()
+            # Never hand out a connection with someone else's uncommitted work (close() used to drop it too)
+            if conn.in_transaction:
+                conn.rollback()
+            try:
+                _db_pool.put_nowait(conn)
+            except queue.Full:
+                conn.close()
 
 # -------------------------------
 # Custom Exceptions
@@ -151,85 +423,161 @@ class AppleAPIError(Exception):
 # -------------------------------
 # Generate JWT Token
 # -------------------------------
+_jwt_cache = {}  # (issuer_id, key_id) -> (token, expires_at)
+_jwt_lock = threading.Lock()
+
+@functools.lru_cache(maxsize=32)
+def load_signing_key(private_key):
+    """Parse a .p8 PEM once so re-signing skips the PEM decode."""
+    pem = private_key.encode() if isinstance(private_key, str) else private_key
+    return load_pem_private_key(pem, password=None)
+
+@functools.lru_cache(maxsize=32)
+def jwt_headers(key_id):
+    return {"alg": "ES256", "kid": key_id, "typ": "JWT"}
+
 def generate_jwt(issuer_id, key_id, private_key):
-    print("Generating JWT token...")
-    headers = {"alg": "ES256", "kid": key_id, "typ": "JWT"}
-    payload = {
-        "iss": issuer_id,
-        "iat": int(time.time()),
-        "exp": int(time.time()) + 20 * 60,
-        "aud": "appstoreconnect-v1"
-    }
-    try:
-        token = jwt.encode(payload, private_key, algorithm="ES256", headers=headers)
-        print("JWT token generated.")
+    """Returns a cached token per store key, re-signing only when it is close to expiry."""
+    now = int(time.time())
+    # Signing happens under the lock too, so when a token expires mid-sync the dozens of
+    # worker threads asking for it at once wait for one signature instead of each making their own
+    with _jwt_lock:
+        cached = _jwt_cache.get((issuer_id, key_id))
+        if cached and cached[1] - JWT_REFRESH_MARGIN > now:
+            return cached[0]
+
+        log.debug("Generating JWT token...")
+        expires_at = now + JWT_LIFETIME
+        payload = {
+            "iss": issuer_id,
+            "iat": now,
+            "exp": expires_at,
+            "aud": "appstoreconnect-v1"
+        }
+        try:
+            token = jwt.encode(payload, load_signing_key(private_key), algorithm="ES256", headers=jwt_headers(key_id))
+        except Exception as e:
+            tb = traceback.format_exc()
+            log.error("Error generating JWT: %s\n%s", e, tb)
+            return None
+        _jwt_cache[(issuer_id, key_id)] = (token, expires_at)
+        log.debug("JWT token generated.")
         return token
-    except Exception as e:
-        tb = traceback.format_exc()
-        print(f"Error generating JWT: {e}\n{tb}")
-        return None
+
+# -------------------------------
+# Rate Limiting
+# -------------------------------
+_rate_remaining = None  # last 'user-hour-rem' Apple reported
+
+def record_rate_limit(response):
+    """Reads Apple's `X-Rate-Limit: user-hour-lim:3600;user-hour-rem:3598;` header."""
+    global _rate_remaining
+    for part in response.headers.get("X-Rate-Limit", "").split(";"):
+        name, _, value = part.partition(":")
+        if name.strip() == "user-hour-rem" and value.strip().isdigit():
+            _rate_remaining = int(value)
+
+def throttle():
+    """Paces bulk loops only when the hourly budget is nearly spent; 429s are retried by the session."""
+    if _rate_remaining is not None and _rate_remaining < RATE_LIMIT_RESERVE:
+        time.sleep(REQUEST_DELAY)
 
 # -------------------------------
 # Generic GET Helper
 # -------------------------------
-def get(url, token):
-    print(f"Fetching data from {url}...")
-    headers = {"Authorization": f"Bearer {token}", "Accept": "application/json"}
+# (scope, {key: raw body}) for the sync run the current thread belongs to. A ContextVar rather than a
+# global so concurrent runs (other stores, other sessions) never see each other's responses; worker
+# threads join the run through submit_in_context / map_in_context.
+_get_cache = contextvars.ContextVar("_get_cache", default=None)
+
+@contextlib.contextmanager
+def cached_gets(scope):
+    """Memoize successful GET bodies for the duration of one sync run (a PATCH in the run clears it).
+
+    `scope` (e.g. the store's issuer and key) is part of every key, so bodies never cross credentials.
+    """
+    reset_token = _get_cache.set((scope, {}))
     try:
-        response = requests.get(url, headers=headers)
-        if response.status_code >= 400:
-            tb = traceback.format_exc()
-            error_details = []
-            try:
-                error_details = response.json().get("errors", [])
-            except:
-                pass
-            raise AppleAPIError(f"GET Request failed for {url} with status {response.status_code}", 
-                                errors=error_details, status_code=response.status_code, traceback_str=tb)
-        
-        print(f"Data fetched from {url}.")
-        return response.json()
+        yield
+    finally:
+        _get_cache.reset(reset_token)
+
+def submit_in_context(executor, fn, *args):
+    """executor.submit that runs `fn` in a copy of the caller's context, so it shares the caller's run cache."""
+    return executor.submit(contextvars.copy_context().run, fn, *args)
+
+def map_in_context(executor, fn, items):
+    """Like executor.map (results in input order), with each call in a copy of the caller's context."""
+    futures = [submit_in_context(executor, fn, item) for item in items]
+    return (future.result() for future in futures)
+
+def get(url, token, params=None):
+    run = _get_cache.get()
+    if run is not None:
+        scope, cache = run
+        cache_key = (scope, url, tuple(params.items()) if params else None)
+        if cache_key in cache:
+            log.debug("GET cache hit: %s %s", url, params or "")
+            return json_loads(cache[cache_key])  # parse again so callers never share (and mutate) one object
+    log.debug("Fetching data from %s %s...", url, params or "")
+    headers = {"Authorization": f"Bearer {token}"}
+    try:
+        response = asc_session.get(url, params=params, headers=headers, timeout=ASC_TIMEOUT)
     except requests.exceptions.RequestException as e:
+        # Transient 429/5xx were already retried by the session; this is the final failure
         tb = traceback.format_exc()
-        print(f"Failed to fetch data from {url}: {e}\n{tb}")
+        log.error("Failed to fetch data from %s: %s\n%s", url, e, tb)
         raise AppleAPIError(f"HTTP Error: {str(e)}", status_code=getattr(e.response, 'status_code', None), traceback_str=tb)
-    except Exception as e:
-        tb = traceback.format_exc()
-        print(f"Unexpected error fetching data from {url}: {e}\n{tb}")
-        raise
+
+    record_rate_limit(response)
+    if response.status_code >= 400:
+        log.warning("HTTP %s from %s: %s", response.status_code, url, error_snippet(response))
+        error_details = []
+        try:
+            error_details = json_loads(response.content).get("errors", [])
+        except ValueError:
+            pass
+        raise AppleAPIError(f"GET Request failed for {url} with status {response.status_code}", 
+                            errors=error_details, status_code=response.status_code)
+
+    log.debug("Data fetched from %s.", url)
+    if run is not None:
+        cache[cache_key] = response.content
+    return json_loads(response.content)
 
 # -------------------------------
 # Generic PATCH Helper
 # -------------------------------
 def patch(url, token, payload):
-    print(f"Patching data to {url}...")
+    log.debug("Patching data to %s...", url)
+    run = _get_cache.get()
+    if run is not None:
+        run[1].clear()
     headers = {
         "Authorization": f"Bearer {token}",
-        "Content-Type": "application/json",
-        "Accept": "application/json"
+        "Content-Type": "application/json"
     }
     try:
-        response = requests.patch(url, json=payload, headers=headers)
-        if response.status_code >= 400:
-            tb = traceback.format_exc()
-            error_details = []
-            try:
-                error_details = response.json().get("errors", [])
-            except:
-                pass
-            raise AppleAPIError(f"PATCH Request failed for {url} with status {response.status_code}", 
-                                errors=error_details, status_code=response.status_code, traceback_str=tb)
-        
-        print(f"Data patched to {url}.")
-        return response.json()
+        response = asc_session.patch(url, data=json_dumps(payload), headers=headers, timeout=ASC_TIMEOUT)
     except requests.exceptions.RequestException as e:
+        # Transient 429/5xx were already retried by the session; this is the final failure
         tb = traceback.format_exc()
-        print(f"Failed to patch data to {url}: {e}\n{tb}")
+        log.error("Failed to patch data to %s: %s\n%s", url, e, tb)
         raise AppleAPIError(f"HTTP Error: {str(e)}", status_code=getattr(e.response, 'status_code', None), traceback_str=tb)
-    except Exception as e:
-        tb = traceback.format_exc()
-        print(f"Unexpected error patching data to {url}: {e}\n{tb}")
-        raise
+
+    record_rate_limit(response)
+    if response.status_code >= 400:
+        log.warning("HTTP %s from %s: %s", response.status_code, url, error_snippet(response))
+        error_details = []
+        try:
+            error_details = json_loads(response.content).get("errors", [])
+        except ValueError:
+            pass
+        raise AppleAPIError(f"PATCH Request failed for {url} with status {response.status_code}", 
+                            errors=error_details, status_code=response.status_code)
+
+    log.debug("Data patched to %s.", url)
+    return json_loads(response.content)
 
 # -------------------------------
 # Fetch All Apps
@@ -244,21 +592,21 @@ def fetch_all_apps(issuer_id, key_id, private_key):
     url = f"{BASE_URL}/apps"
     
     while url:
-        data = get(url, token)
+        # Cache hit per page; a long pagination run picks up a fresh token instead of outliving the first one
+        data = get(url, generate_jwt(issuer_id, key_id, private_key) or token)
         if not data:
             print("Failed to fetch apps.")
             return None
         apps.extend(data.get("data", []))
         url = data.get("links", {}).get("next")
-        print(f"Fetched {len(data.get('data', []))} apps, next URL: {url or 'None'}")
-        time.sleep(REQUEST_DELAY)
+        log.debug("Fetched %d apps, next URL: %s", len(data.get('data', [])), url or 'None')
+        throttle()
     print(f"Fetched total {len(apps)} apps.")
-    sync_db_to_github()
     return apps
 
 def get_app_info_state(app_id, issuer_id, key_id, private_key):
     """Fetches the current appStoreState for the App Info without filtering."""
-    print(f"Fetching app info state for app ID {app_id}...")
+    log.debug("Fetching app info state for app ID %s...", app_id)
     token = generate_jwt(issuer_id, key_id, private_key)
     if not token:
         print("JWT generation failed.")
@@ -275,24 +623,23 @@ def get_app_info_state(app_id, issuer_id, key_id, private_key):
         # Select the same index as in fetch_app_info (1 if >1 records, else 0)
         index = 1 if len(raw_data["data"]) > 1 else 0
         state = raw_data["data"][index].get("attributes", {}).get("appStoreState")
-        print(f"App info state: {state}")
+        log.debug("App info state: %s", state)
         return state
     
     return None
 
 def get_app_version_state(app_id, issuer_id, key_id, private_key, platform=None):
     """Fetches the current appStoreState for the app version without filtering."""
-    print(f"Fetching app version state for app ID {app_id}...")
+    log.debug("Fetching app version state for app ID %s...", app_id)
     token = generate_jwt(issuer_id, key_id, private_key)
     if not token:
         print("JWT generation failed.")
         return None
 
     url = f"{BASE_URL}/apps/{app_id}/appStoreVersions"
-    if platform:
-        url += f"?filter[platform]={platform}"
+    params = {"filter[platform]": platform} if platform else None
         
-    raw_data = get(url, token)
+    raw_data = get(url, token, params)
     
     if not raw_data or "data" not in raw_data:
         print("No version data returned.")
@@ -302,13 +649,13 @@ def get_app_version_state(app_id, issuer_id, key_id, private_key, platform=None)
         # Usually we want the latest or the one being edited. 
         # For simplicity, if platform is filtered, we take the first one returned by API.
         state = raw_data["data"][0].get("attributes", {}).get("appStoreState")
-        print(f"App version state: {state}")
+        log.debug("App version state: %s", state)
         return state
     
     return None
 
-def fetch_app_info(app_id, issuer_id, key_id, private_key, fields=None):
-    print(f"Fetching app info for app ID {app_id}...")
+def fetch_app_info(app_id, issuer_id, key_id, private_key, fields=None, include_localizations=False):
+    log.debug("Fetching app info for app ID %s...", app_id)
     token = generate_jwt(issuer_id, key_id, private_key)
     if not token:
         print("JWT generation failed.")
@@ -317,17 +664,16 @@ def fetch_app_info(app_id, issuer_id, key_id, private_key, fields=None):
     params = {}
     if fields:
         params["fields[appInfos]"] = ",".join(fields)
+    if include_localizations:
+        params["include"] = "appInfoLocalizations"
+        params["limit[appInfoLocalizations]"] = LOCALIZATION_INCLUDE_LIMIT
 
     url = f"{BASE_URL}/apps/{app_id}/appInfos"
-    if params:
-        url += "?" + "&".join(f"{k}={v}" for k, v in params.items())
-
-    print(f"GET: {url}")
-    raw_data = get(url, token)
+    log.debug("GET: %s %s", url, params)
+    raw_data = get(url, token, params)
     
     if not raw_data or "data" not in raw_data:
         print("No data returned.")
-        sync_db_to_github()
         return None
 
     # ── Sirf PREPARE_FOR_SUBMISSION wala record filter karo ──
@@ -337,20 +683,19 @@ def fetch_app_info(app_id, issuer_id, key_id, private_key, fields=None):
     ]
 
     if prepare_records:
-        print(f"Found {len(prepare_records)} PREPARE_FOR_SUBMISSION appInfo record(s)")
-        filtered_data = {"data": prepare_records}
+        log.debug("Found %d PREPARE_FOR_SUBMISSION appInfo record(s)", len(prepare_records))
+        filtered_data = {"data": prepare_records, "included": raw_data.get("included", [])}
     else:
         current_state = get_app_info_state(app_id, issuer_id, key_id, private_key)
         print(f"No PREPARE_FOR_SUBMISSION appInfo found for this app, it is in {current_state} state.")
         filtered_data = {"data": []}  # ya warning raise kar sakte ho
 
-    sync_db_to_github()
     return filtered_data
 # -------------------------------
 # Fetch App Info Localizations
 # -------------------------------
 def fetch_app_info_localizations(app_info_id, issuer_id, key_id, private_key, fields=None):
-    print(f"Fetching app info localizations for app info ID {app_info_id}...")
+    log.debug("Fetching app info localizations for app info ID %s...", app_info_id)
     token = generate_jwt(issuer_id, key_id, private_key)
     if not token:
         print("JWT generation failed.")
@@ -361,22 +706,19 @@ def fetch_app_info_localizations(app_info_id, issuer_id, key_id, private_key, fi
         params["fields[appInfoLocalizations]"] = ",".join(fields)
 
     url = f"{BASE_URL}/appInfos/{app_info_id}/appInfoLocalizations"
-    if params:
-        url += "?" + "&".join(f"{k}={v}" for k, v in params.items())
-
-    print(f"GET: {url}")
-    data = get(url, token)
+    log.debug("GET: %s %s", url, params)
+    data = get(url, token, params)
     if data:
         count = len(data.get("data", []))
-        print(f"Fetched {count} app info localization(s).")
-    sync_db_to_github()
+        log.debug("Fetched %d app info localization(s).", count)
     return data
 
 # -------------------------------
 # Fetch App Store Versions with Filter
 # -------------------------------
-def fetch_app_store_versions(app_id, issuer_id, key_id, private_key, platform=None, fields=None):
-    print(f"Fetching app store versions for app ID {app_id}...")
+def fetch_app_store_versions(app_id, issuer_id, key_id, private_key, platform=None, fields=None,
+                             include_localizations=False):
+    log.debug("Fetching app store versions for app ID %s...", app_id)
     token = generate_jwt(issuer_id, key_id, private_key)
     if not token:
         print("JWT generation failed.")
@@ -389,27 +731,27 @@ def fetch_app_store_versions(app_id, issuer_id, key_id, private_key, platform=No
         params["filter[platform]"] = platform
     if fields:
         params["fields[appStoreVersions]"] = ",".join(fields)
+    if include_localizations:
+        params["include"] = "appStoreVersionLocalizations"
+        params["limit[appStoreVersionLocalizations]"] = LOCALIZATION_INCLUDE_LIMIT
 
     url = f"{BASE_URL}/apps/{app_id}/appStoreVersions"
-    query_string = "&".join(f"{k}={v}" for k, v in params.items())
-    full_url = f"{url}?{query_string}"
 
-    print(f"GET: {full_url}")
-    data = get(full_url, token)
+    log.debug("GET: %s %s", url, params)
+    data = get(url, token, params)
     if data:
-        print(f"Fetched {len(data.get('data', []))} versions.")
+        log.debug("Fetched %d versions.", len(data.get('data', [])))
     else:
         current_state = get_app_version_state(app_id, issuer_id, key_id, private_key, platform)
         print(f"No PREPARE_FOR_SUBMISSION appstore version found for this app, it is in {current_state} state.")
 
-    sync_db_to_github()
     return data
 
 # -------------------------------
 # Fetch App Store Version Localizations
 # -------------------------------
 def fetch_app_store_version_localizations(version_id, issuer_id, key_id, private_key, fields=None):
-    print(f"Fetching version localizations for version ID {version_id}...")
+    log.debug("Fetching version localizations for version ID %s...", version_id)
     token = generate_jwt(issuer_id, key_id, private_key)
     if not token:
         print("JWT generation failed.")
@@ -420,28 +762,24 @@ def fetch_app_store_version_localizations(version_id, issuer_id, key_id, private
         params["fields[appStoreVersionLocalizations]"] = ",".join(fields)
 
     url = f"{BASE_URL}/appStoreVersions/{version_id}/appStoreVersionLocalizations"
-    if params:
-        url += "?" + "&".join(f"{k}={v}" for k, v in params.items())
-
-    print(f"GET: {url}")
-    data = get(url, token)
+    log.debug("GET: %s %s", url, params)
+    data = get(url, token, params)
     if data:
-        print(f"Fetched {len(data.get('data', []))} localizations.")
-    sync_db_to_github()
+        log.debug("Fetched %d localizations.", len(data.get('data', [])))
     return data
 
 # -------------------------------
 # Patch App Info Localization
 # -------------------------------
 def patch_app_info_localization(localization_id, attributes, issuer_id, key_id, private_key):
-    print(f"Patching app info localization ID {localization_id}...")
+    log.debug("Patching app info localization ID %s...", localization_id)
     token = generate_jwt(issuer_id, key_id, private_key)
     if not token:
         print(f"Failed to generate JWT for patching app info localization ID {localization_id}.")
         return False
     url = f"{BASE_URL}/appInfoLocalizations/{localization_id}"
     # Convert attribute names to camelCase
-    mapped_attributes = {ATTRIBUTE_MAPPING.get(k, k): v for k, v in attributes.items() if v is not None}
+    mapped_attributes = to_api_attributes(attributes)
     payload = {
         "data": {
             "type": "appInfoLocalizations",
@@ -456,14 +794,14 @@ def patch_app_info_localization(localization_id, attributes, issuer_id, key_id,
 # Patch App Store Version Localization
 # -------------------------------
 def patch_app_store_version_localization(localization_id, attributes, issuer_id, key_id, private_key):
-    print(f"Patching app store version localization ID {localization_id}...")
+    log.debug("Patching app store version localization ID %s...", localization_id)
     token = generate_jwt(issuer_id, key_id, private_key)
     if not token:
         print(f"Failed to generate JWT for patching app store version localization ID {localization_id}.")
         return False
     url = f"{BASE_URL}/appStoreVersionLocalizations/{localization_id}"
     # Convert attribute names to camelCase
-    mapped_attributes = {ATTRIBUTE_MAPPING.get(k, k): v for k, v in attributes.items() if v is not None}
+    mapped_attributes = to_api_attributes(attributes)
     payload = {
         "data": {
             "type": "appStoreVersionLocalizations",
@@ -479,14 +817,14 @@ def patch_app_store_version_localization(localization_id, attributes, issuer_id,
 # -------------------------------
 def patch_app_store_version_localization(localization_id, attributes, issuer_id, key_id, private_key):
     attr = list(attributes.keys())[0] if attributes else "unknown"
-    print(f"PATCH App-Info – attribute '{attr}'")
+    log.debug("PATCH App-Info – attribute '%s'", attr)
     token = generate_jwt(issuer_id, key_id, private_key)
     if not token:
         print(f"Failed to generate JWT for patching app store version localization ID {localization_id}.")
         return False
     url = f"{BASE_URL}/appStoreVersionLocalizations/{localization_id}"
     # Convert attribute names to camelCase
-    mapped_attributes = {ATTRIBUTE_MAPPING.get(k, k): v for k, v in attributes.items() if v is not None}
+    mapped_attributes = to_api_attributes(attributes)
     payload = {
         "data": {
             "type": "appStoreVersionLocalizations",
@@ -503,149 +841,169 @@ def patch_app_store_version_localization(localization_id, attributes, issuer_id,
 # -------------------------------
 # NEW: Fetch Screenshots (Exact Sync + Platform Filter)
 # -------------------------------
-def fetch_screenshots(app_id, store_id, issuer_id, key_id, private_key, platform=None):
-    """
-    Fetches ALL screenshots for an app (iOS/macOS) and EXACTLY mirrors API to DB.
-    - Deletes old screenshots (for platform or all)
-    - Inserts only latest from API with INSERT OR IGNORE to avoid duplicate ID crash
+# One long-lived pool for every screenshot listing GET: threads are reused across apps instead of being
+# spun up per call, and the pool size caps in-flight listings at the asc_session connection pool.
+_listing_executor = ThreadPoolExecutor(max_workers=APP_WORKERS * SCREENSHOT_WORKERS, thread_name_prefix="asc-listing")
+
+def collect_screenshots(app_id, store_id, issuer_id, key_id, private_key, platform=None,
+                        versions=None, localizations_by_version=None):
+    """HTTP half of fetch_screenshots: the app's screenshot dicts, or None if there is nothing to mirror.
+
+    Callers that already fetched the versions / their localizations pass them in to skip those requests.
     """
-    print(f"[Screenshots] Starting fetch for app {app_id}, platform: {platform or 'ALL'}")
+    log.info("[Screenshots] Starting fetch for app %s, platform: %s", app_id, platform or 'ALL')
     token = generate_jwt(issuer_id, key_id, private_key)
     if not token:
-        print("JWT generation failed for screenshots.")
-        return []
+        log.error("JWT generation failed for screenshots.")
+        return None
 
     # Step 1: Get versions (filter by platform if needed)
-    versions_data = fetch_app_store_versions(
-        app_id, issuer_id, key_id, private_key,
-        platform=platform,
-        fields=['platform', 'appStoreVersionLocalizations']
+    if versions is None:
+        versions_data = fetch_app_store_versions(
+            app_id, issuer_id, key_id, private_key,
+            platform=platform,
+            fields=['platform', 'appStoreVersionLocalizations']
+        )
+        if not versions_data or 'data' not in versions_data:
+            log.info("No %s version found in PREPARE_FOR_SUBMISSION.", platform or 'any')
+            return None
+        versions = versions_data['data']
+    localizations_by_version = localizations_by_version or {}
+
+    def fetch_listing(url):
+        """Related-resource listing; [] on failure so one bad locale or set doesn't sink the rest."""
+        try:
+            data = get(url, generate_jwt(issuer_id, key_id, private_key) or token)  # cached; refreshed near expiry
+        except Exception as e:
+            log.warning("[Screenshots] Thread error: %s", e)
+            return []
+        return data.get('data', []) if data else []
+
+    versions = [
+        version for version in versions
+        if not platform or version['attributes'].get('platform', 'UNKNOWN') == platform
+    ]
+
+    def version_localizations(version):
+        if version['id'] in localizations_by_version:
+            return {'data': localizations_by_version[version['id']]}
+        return fetch_app_store_version_localizations(
+            version['id'], issuer_id, key_id, private_key,
+            fields=['locale', 'appScreenshotSets']
+        )
+
+    # Three fan-outs (localizations -> sets -> screenshots); map keeps each phase in input order
+    locs_results = map_in_context(_listing_executor, version_localizations, versions)
+    localizations = [
+        (loc, version['attributes'].get('platform', 'UNKNOWN'))
+        for version, locs_data in zip(versions, locs_results)
+        if locs_data and 'data' in locs_data
+        for loc in locs_data['data']
+    ]
+
+    sets_results = map_in_context(
+        _listing_executor, fetch_listing, (f"{BASE_URL}/appStoreVersionLocalizations/{loc['id']}/appScreenshotSets" for loc, _ in localizations)
+    )
+    screenshot_sets = [
+        (loc, platform_name, sset)
+        for (loc, platform_name), sets in zip(localizations, sets_results)
+        for sset in sets
+    ]
+
+    shots_results = map_in_context(
+        _listing_executor, fetch_listing, (sset['relationships']['appScreenshots']['links']['related'] for _, _, sset in screenshot_sets)
     )
-    if not versions_data or 'data' not in versions_data:
-        print(f"No {platform or 'any'} version found in PREPARE_FOR_SUBMISSION.")
-        return []
 
     all_screenshots = []
     seen_ids = set()  # For debugging duplicate IDs from API
-
-    def process_localization(loc, platform_name, token):
+    for (loc, platform_name, sset), shots in zip(screenshot_sets, shots_results):
         locale = loc['attributes']['locale']
-        sets_url = loc['relationships']['appScreenshotSets']['links']['related']
-        sets_data = get(sets_url, token)
-        if not sets_data or 'data' not in sets_data:
-            return []
+        disp = sset['attributes']['screenshotDisplayType']
+        for shot in shots:
+            attributes = shot.get('attributes', {})
+            image_asset = attributes.get('imageAsset', {})
+
+            # Create URL from template (one replace chain; missing placeholders are a cheap no-op)
+            width, height = image_asset.get('width', 0), image_asset.get('height', 0)
+            url = image_asset.get('templateUrl', '').replace("{w}", str(width)).replace("{h}", str(height)).replace("{f}", "png")
+
+            sid = shot['id']
+            if sid in seen_ids:
+                log.warning("Duplicate screenshot ID from API: %s (locale: %s, display: %s)", sid, locale, disp)
+            seen_ids.add(sid)
+            all_screenshots.append({
+                'id': sid,
+                'app_id': app_id,
+                'store_id': store_id,
+                'localization_id': loc['id'],
+                'locale': locale,
+                'display_type': disp,
+                'url': url,
+                'width': width,
+                'height': height,
+                'platform': platform_name
+            })
+
+    log.info("[Screenshots] Total screenshots fetched from API: %d", len(all_screenshots))
+    return all_screenshots
 
-        locale_shots = []
-        for sset in sets_data['data']:
-            disp = sset['attributes']['screenshotDisplayType']
-            shots_url = sset['relationships']['appScreenshots']['links']['related']
-            shots_data = get(shots_url, token)
-            if not shots_data or 'data' not in shots_data:
-                continue
-
-            for shot in shots_data['data']:
-                attributes = shot.get('attributes', {})
-                image_asset = attributes.get('imageAsset', {})
-                
-                # Create URL from template
-                url_template = image_asset.get('templateUrl', '')
-                url = url_template
-                if url:
-                    url = url.replace("{w}", str(image_asset.get("width", 0)))
-                    url = url.replace("{h}", str(image_asset.get("height", 0)))
-                    if "{f}" in url:
-                        url = url.replace("{f}", "png")  # or 'jpg' based on your needs
-
-                shot_info = {
-                    'id': shot['id'],
-                    'app_id': app_id,
-                    'store_id': store_id,
-                    'localization_id': loc['id'],
-                    'locale': locale,
-                    'display_type': disp,
-                    'url': url,
-                    'width': image_asset.get('width', 0),
-                    'height': image_asset.get('height', 0),
-                    'platform': platform_name
-                }
-                sid = shot['id']
-                if sid in seen_ids:
-                    print(f"[WARNING] Duplicate screenshot ID from API: {sid} (locale: {locale}, display: {disp})")
-                seen_ids.add(sid)
-                locale_shots.append(shot_info)
-        return locale_shots
-
-    # Parallel processing for speed
-    with ThreadPoolExecutor(max_workers=6) as executor:
-        futures = []
-        for version in versions_data['data']:
-            version_id = version['id']
-            platform_name = version['attributes'].get('platform', 'UNKNOWN')
-            if platform and platform_name != platform:
-                continue
-            locs_data = fetch_app_store_version_localizations(
-                version_id, issuer_id, key_id, private_key,
-                fields=['locale', 'appScreenshotSets']
+def store_screenshots(cursor, app_id, store_id, shots, platform=None):
+    """DB half: mirrors the app's (platform's) screenshots on `cursor`; returns how many unique ones are stored."""
+    # Upsert keeps duplicate IDs from the API from crashing the batch (the last copy wins)
+    try:
+        cursor.executemany(INSERT_SCREENSHOT_SQL, [
+            (
+                shot['id'], shot['app_id'], shot['store_id'], shot['localization_id'],
+                shot['locale'], shot['display_type'], shot['url'], shot['width'], shot['height'], shot['platform']
             )
-            if locs_data and 'data' in locs_data:
-                for loc in locs_data['data']:
-                    futures.append(executor.submit(process_localization, loc, platform_name, token))
-
-        for future in futures:
-            try:
-                all_screenshots.extend(future.result(timeout=40))
-            except Exception as e:
-                print(f"[Screenshots] Thread error: {e}")
+            for shot in shots
+        ])
+    except Exception as e:
+        log.error("Failed to insert screenshots: %s", e)
+        return 0
 
-    print(f"[Screenshots] Total screenshots fetched from API: {len(all_screenshots)}")
+    keep_ids = {shot['id'] for shot in shots}
+    if platform:
+        delete_missing_rows(cursor, "app_screenshots", "id", keep_ids,
+                            "app_id = ? AND store_id = ? AND platform = ?", (app_id, store_id, platform))
+    else:
+        delete_missing_rows(cursor, "app_screenshots", "id", keep_ids, "app_id = ? AND store_id = ?", (app_id, store_id))
+    return len(keep_ids)
 
-    # --- EXACT DB SYNC: DELETE OLD + INSERT NEW (with duplicate protection) ---
-    with get_db_connection() as conn:
-        cursor = conn.cursor()
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS app_screenshots (
-                id TEXT PRIMARY KEY,
-                app_id TEXT,
-                store_id INTEGER,
-                localization_id TEXT,
-                locale TEXT,
-                display_type TEXT,
-                url TEXT,
-                width INTEGER,
-                height INTEGER,
-                platform TEXT
-            )
-        """)
+_screenshots_table_ready = False  # CREATE TABLE IF NOT EXISTS only needs to run once per process
 
-        # DELETE old data
-        if platform:
-            cursor.execute(
-                "DELETE FROM app_screenshots WHERE app_id = ? AND store_id = ? AND platform = ?",
-                (app_id, store_id, platform)
-            )
-        else:
-            cursor.execute(
-                "DELETE FROM app_screenshots WHERE app_id = ? AND store_id = ?",
-                (app_id, store_id)
-            )
+def fetch_screenshots(app_id, store_id, issuer_id, key_id, private_key, platform=None):
+    """
+    Fetches ALL screenshots for an app (iOS/macOS) and EXACTLY mirrors API to DB.
+    - Upserts the latest screenshots from the API (duplicate IDs collapse into one row)
+    - Deletes screenshots the API no longer returns (for platform or all)
+    """
+    all_screenshots = collect_screenshots(app_id, store_id, issuer_id, key_id, private_key, platform=platform)
+    if all_screenshots is None:
+        return []
 
-        # INSERT with OR IGNORE to prevent crash on duplicate IDs
-        inserted_count = 0
-        for shot in all_screenshots:
-            try:
-                cursor.execute("""
-                    INSERT OR IGNORE INTO app_screenshots 
-                    (id, app_id, store_id, localization_id, locale, display_type, url, width, height, platform)
-                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                """, (
-                    shot['id'], shot['app_id'], shot['store_id'], shot['localization_id'],
-                    shot['locale'], shot['display_type'], shot['url'], shot['width'], shot['height'], shot['platform']
-                ))
-                if cursor.rowcount > 0:
-                    inserted_count += 1
-            except Exception as e:
-                print(f"[ERROR] Failed to insert screenshot {shot['id']}: {e}")
+    # --- EXACT DB SYNC: UPSERT NEW + DELETE MISSING (with duplicate protection) ---
+    global _screenshots_table_ready
+    with DB_WRITE_LOCK, get_db_connection() as conn:
+        cursor = conn.cursor()
+        if not _screenshots_table_ready:
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS app_screenshots (
+                    id TEXT PRIMARY KEY,
+                    app_id TEXT,
+                    store_id INTEGER,
+                    localization_id TEXT,
+                    locale TEXT,
+                    display_type TEXT,
+                    url TEXT,
+                    width INTEGER,
+                    height INTEGER,
+                    platform TEXT
+                )
+            """)
+            _screenshots_table_ready = True
 
+        inserted_count = store_screenshots(cursor, app_id, store_id, all_screenshots, platform=platform)
         conn.commit()
 
     # --- UI FEEDBACK ---
@@ -659,17 +1017,52 @@ def fetch_screenshots(app_id, store_id, issuer_id, key_id, private_key, platform
     else:
         print(f"No screenshots found for {platform or 'any platform'}.")
 
-    sync_db_to_github()
     return all_screenshots
 
 # -------------------------------
 # NEW: Upload Screenshots (Dashboard Version) - Replaces patch_screenshots
 # -------------------------------
-def upload_screenshots_dashboard(issuer_id, key_id, private_key, app_id, locale, platform, display_type, action, files):
+def fetch_upload_localization_ids(issuer_id, key_id, private_key, app_id, platform):
+    """{locale (lowercase): localization id} for the platform's PREPARE_FOR_SUBMISSION version, or None if there is none.
+
+    Raises AppleAPIError when a response body is not the expected JSON.
+    """
+    token = generate_jwt(issuer_id, key_id, private_key)
+    if not token:
+        return None
+    headers = {"Authorization": f"Bearer {token}"}
+
+    # 1. Get App Store Version (PREPARE_FOR_SUBMISSION)
+    versions_resp = asc_session.get(f"{BASE_URL}/apps/{app_id}/appStoreVersions", headers=headers, timeout=ASC_TIMEOUT)
+    versions_resp.raise_for_status()
+    try:
+        versions = json_loads(versions_resp.content)["data"]
+        version = next(
+            (v for v in versions
+             if v["attributes"]["platform"] == platform and v["attributes"]["appStoreState"] == "PREPARE_FOR_SUBMISSION"),
+            None
+        )
+    except (KeyError, TypeError, ValueError) as e:
+        raise AppleAPIError(f"Malformed appStoreVersions response: {e}", status_code=versions_resp.status_code)
+    if not version:
+        log.error("No %s version in PREPARE_FOR_SUBMISSION", platform)
+        return None
+
+    # 2. Get Localizations
+    locs_resp = asc_session.get(f"{BASE_URL}/appStoreVersions/{version['id']}/appStoreVersionLocalizations", headers=headers, timeout=ASC_TIMEOUT)
+    locs_resp.raise_for_status()
+    try:
+        return {l["attributes"]["locale"].lower(): l["id"] for l in json_loads(locs_resp.content)["data"]}
+    except (KeyError, TypeError, ValueError, AttributeError) as e:
+        raise AppleAPIError(f"Malformed appStoreVersionLocalizations response: {e}", status_code=locs_resp.status_code)
+
+def upload_screenshots_dashboard(issuer_id, key_id, private_key, app_id, locale, platform, display_type, action, files,
+                                 localization_ids=None):
     """
     Uploads or replaces screenshots via Apple App Store Connect API
     action: "POST" or "UPDATE"
     files: list of (filename, bytes, format)
+    localization_ids: result of fetch_upload_localization_ids, shared across a batch of uploads
     """
 
     token = generate_jwt(issuer_id, key_id, private_key)
@@ -680,35 +1073,21 @@ def upload_screenshots_dashboard(issuer_id, key_id, private_key, app_id, locale,
     headers = {"Authorization": f"Bearer {token}", "Content-Type": "application/json"}
 
     try:
-        # 1. Get App Store Version (PREPARE_FOR_SUBMISSION)
-        versions_resp = requests.get(f"{BASE}/apps/{app_id}/appStoreVersions", headers=headers)
-        versions_resp.raise_for_status()
-        versions = versions_resp.json()["data"]
-        version = next(
-            (v for v in versions
-             if v["attributes"]["platform"] == platform and v["attributes"]["appStoreState"] == "PREPARE_FOR_SUBMISSION"),
-            None
-        )
-        if not version:
-            print(f"[ERROR] No {platform} version in PREPARE_FOR_SUBMISSION")
-            return False
-        version_id = version["id"]
-
-        # 2. Get Localization
-        locs_resp = requests.get(f"{BASE}/appStoreVersions/{version_id}/appStoreVersionLocalizations", headers=headers)
-        locs_resp.raise_for_status()
-        locs = locs_resp.json()["data"]
-        loc = next((l for l in locs if l["attributes"]["locale"].lower() == locale.lower()), None)
-        if not loc:
-            print(f"[ERROR] Locale {locale} not found")
+        # 1-2. Resolve the localization (once per batch when the caller passes localization_ids)
+        if localization_ids is None:
+            localization_ids = fetch_upload_localization_ids(issuer_id, key_id, private_key, app_id, platform)
+            if localization_ids is None:
+                return False
+        loc_id = localization_ids.get(locale.lower())
+        if not loc_id:
+            log.error("Locale %s not found", locale)
             return False
-        loc_id = loc["id"]
 
         # 3. Get or Create Screenshot Set
-        sets_resp = requests.get(f"{BASE}/appStoreVersionLocalizations/{loc_id}/appScreenshotSets", headers=headers)
+        sets_resp = asc_session.get(f"{BASE}/appStoreVersionLocalizations/{loc_id}/appScreenshotSets", headers=headers, timeout=ASC_TIMEOUT)
         sets_resp.raise_for_status()
-        sets = sets_resp.json()["data"]
-        sset = next((s for s in sets if s["attributes"]["screenshotDisplayType"] == display_type), None)
+        sets_by_display_type = {s["attributes"]["screenshotDisplayType"]: s for s in json_loads(sets_resp.content)["data"]}
+        sset = sets_by_display_type.get(display_type)
 
         if not sset:
             create_payload = {
@@ -722,31 +1101,34 @@ def upload_screenshots_dashboard(issuer_id, key_id, private_key, app_id, locale,
                     }
                 }
             }
-            create_resp = requests.post(f"{BASE}/appScreenshotSets", json=create_payload, headers=headers)
+            create_resp = asc_session.post(f"{BASE}/appScreenshotSets", data=json_dumps(create_payload), headers=headers, timeout=ASC_TIMEOUT)
             if create_resp.status_code != 201:
-                print(f"[ERROR] Failed to create screenshot set: {create_resp.text}")
+                log.error("Failed to create screenshot set: %s", error_snippet(create_resp))
                 return False
-            sset_id = create_resp.json()["data"]["id"]
-            print(f"[INFO] Created new screenshot set: {sset_id}")
+            sset_id = json_loads(create_resp.content)["data"]["id"]
+            log.info("Created new screenshot set: %s", sset_id)
         else:
             sset_id = sset["id"]
-            print(f"[INFO] Using existing screenshot set: {sset_id}")
+            log.debug("Using existing screenshot set: %s", sset_id)
 
         # 4. If UPDATE → Delete all existing
         if action == "UPDATE":
-            existing_resp = requests.get(f"{BASE}/appScreenshotSets/{sset_id}/appScreenshots", headers=headers)
+            existing_resp = asc_session.get(f"{BASE}/appScreenshotSets/{sset_id}/appScreenshots", headers=headers, timeout=ASC_TIMEOUT)
             existing_resp.raise_for_status()
-            existing = existing_resp.json().get("data", [])
+            existing = json_loads(existing_resp.content).get("data", [])
             for shot in existing:
-                del_resp = requests.delete(f"{BASE}/appScreenshots/{shot['id']}", headers=headers)
+                del_resp = asc_session.delete(f"{BASE}/appScreenshots/{shot['id']}", headers=headers, timeout=ASC_TIMEOUT)
                 if del_resp.status_code not in [200, 204]:
-                    print(f"[WARN] Failed to delete old screenshot {shot['id']}")
-            print(f"[INFO] Deleted {len(existing)} existing screenshots.")
+                    log.warning("Failed to delete old screenshot %s", shot['id'])
+            log.info("Deleted %d existing screenshots.", len(existing))
 
         # 5. Upload each file
         uploaded = 0
         for idx, (filename, file_bytes, img_format) in enumerate(files, 1):
-            print(f"[UPLOAD] {idx}/{len(files)}: {filename}")
+            log.debug("[UPLOAD] %d/%d: %s", idx, len(files), filename)
+            # Cached per store key; only re-signs if a long batch nears the 20-minute expiry
+            token = generate_jwt(issuer_id, key_id, private_key) or token
+            headers["Authorization"] = f"Bearer {token}"
 
             # Create placeholder
             create_payload = {
@@ -763,12 +1145,12 @@ def upload_screenshots_dashboard(issuer_id, key_id, private_key, app_id, locale,
                     }
                 }
             }
-            create_resp = requests.post(f"{BASE}/appScreenshots", json=create_payload, headers=headers)
+            create_resp = asc_session.post(f"{BASE}/appScreenshots", data=json_dumps(create_payload), headers=headers, timeout=ASC_TIMEOUT)
             if create_resp.status_code != 201:
-                print(f"[ERROR] Create failed: {create_resp.text}")
+                log.error("Create failed: %s", error_snippet(create_resp))
                 return False
 
-            data = create_resp.json()["data"]
+            data = json_loads(create_resp.content)["data"]
             screenshot_id = data["id"]
             upload_ops = data["attributes"]["uploadOperations"]
 
@@ -778,33 +1160,34 @@ def upload_screenshots_dashboard(issuer_id, key_id, private_key, app_id, locale,
                 length = op["length"]
                 chunk = file_bytes[start:start + length]
                 op_headers = {h["name"]: h["value"] for h in op.get("headers", [])}
-                up_resp = requests.request(op["method"], op["url"], data=chunk, headers=op_headers, timeout=60)
+                up_resp = asc_session.request(op["method"], op["url"], data=chunk, headers=op_headers, timeout=60)
                 if up_resp.status_code >= 400:
-                    print(f"[ERROR] Chunk upload failed: {up_resp.status_code}")
+                    log.error("Chunk upload failed: %s", up_resp.status_code)
                     return False
 
             # Finalize upload
-            finalize_resp = requests.patch(
+            finalize_resp = asc_session.patch(
                 f"{BASE}/appScreenshots/{screenshot_id}",
-                json={"data": {"type": "appScreenshots", "id": screenshot_id, "attributes": {"uploaded": True}}},
-                headers=headers
+                data=json_dumps({"data": {"type": "appScreenshots", "id": screenshot_id, "attributes": {"uploaded": True}}}),
+                headers=headers,
+                timeout=ASC_TIMEOUT
             )
             if finalize_resp.status_code != 200:
-                print(f"[ERROR] Finalize failed: {finalize_resp.text}")
+                log.error("Finalize failed: %s", error_snippet(finalize_resp))
                 return False
 
             uploaded += 1
 
-        print(f"[SUCCESS] Uploaded {uploaded} screenshot(s)")
+        log.info("Uploaded %d screenshot(s)", uploaded)
         return True
 
     except requests.exceptions.RequestException as e:
         tb = traceback.format_exc()
-        print(f"[HTTP ERROR] {e}\n{tb}")
+        log.error("HTTP error during screenshot upload: %s\n%s", e, tb)
         error_details = []
         if e.response is not None:
             try:
-                error_details = e.response.json().get("errors", [])
+                error_details = json_loads(e.response.content).get("errors", [])
             except:
                 pass
         raise AppleAPIError(f"HTTP Error during screenshot upload: {str(e)}", 
@@ -813,108 +1196,127 @@ def upload_screenshots_dashboard(issuer_id, key_id, private_key, app_id, locale,
                             traceback_str=tb)
     except Exception as e:
         tb = traceback.format_exc()
-        print(f"[EXCEPTION] {e}\n{tb}")
+        log.error("Unexpected error during screenshot upload: %s\n%s", e, tb)
         raise AppleAPIError(f"Unexpected error during screenshot upload: {str(e)}", traceback_str=tb)
 
 # -------------------------------
 # Process Single App Data (UPDATED: Delete old data first)
 # -------------------------------
-def process_app(app, store_id, issuer_id, key_id, private_key):
+def included_localizations(resource, payload, relationship):
+    """Localizations embedded via ?include=, or None when the response did not carry all of them."""
+    rel = resource.get("relationships", {}).get(relationship, {})
+    refs = rel.get("data")
+    if refs is None:
+        return None
+    total = rel.get("meta", {}).get("paging", {}).get("total", len(refs))
+    if total > len(refs):
+        return None
+    by_id = {item["id"]: item for item in payload.get("included", []) if item.get("type") == relationship}
+    if any(ref["id"] not in by_id for ref in refs):
+        return None
+    return [by_id[ref["id"]] for ref in refs]
+
+def collect_app_rows(app, store_id, issuer_id, key_id, private_key):
+    """HTTP half of process_app: every row to store for one app, without touching the DB."""
     app_id = app.get("id")
     app_name = app.get("attributes", {}).get("name", "Unknown")
-    print(f"Starting fetch for app: {app_name} (ID: {app_id})")
+    log.info("Starting fetch for app: %s (ID: %s)", app_name, app_id)
 
-    # === STEP 1: DELETE ALL OLD DATA FOR THIS APP ===
-    print(f"[SYNC] Deleting old data for app {app_id}...")
-    with get_db_connection() as conn:
-        cursor = conn.cursor()
-        cursor.execute("DELETE FROM app_screenshots WHERE app_id = ? AND store_id = ?", (app_id, store_id))
-        cursor.execute("DELETE FROM app_version_localizations WHERE app_id = ? AND store_id = ?", (app_id, store_id))
-        cursor.execute("DELETE FROM app_versions WHERE app_id = ? AND store_id = ?", (app_id, store_id))
-        cursor.execute("DELETE FROM app_info_localizations WHERE app_id = ? AND store_id = ?", (app_id, store_id))
-        conn.commit()
-    print(f"[SYNC] Old data deleted for app {app_id}.")
-
-    # === STEP 2: Save app name (always fresh) ===
-    with get_db_connection() as conn:
-        cursor = conn.cursor()
-        cursor.execute(
-            "INSERT OR REPLACE INTO apps (app_id, store_id, name) VALUES (?, ?, ?)",
-            (app_id, store_id, app_name)
-        )
-        conn.commit()
-
-    # === STEP 3: Fetch & Insert App Info (Delete + Insert) ===
-    app_info_data = fetch_app_info(app_id, issuer_id, key_id, private_key)
+    # === STEP 1: Fetch App Info + Versions + Screenshots over HTTP ===
+    info_rows = []
+    app_info_data = fetch_app_info(app_id, issuer_id, key_id, private_key, include_localizations=True)
     if app_info_data and "data" in app_info_data and app_info_data["data"]:
         app_info_index = 1 if len(app_info_data["data"]) > 1 else 0
-        app_info_id = app_info_data["data"][app_info_index].get("id")
-        app_info_localizations = fetch_app_info_localizations(app_info_id, issuer_id, key_id, private_key)
-        time.sleep(REQUEST_DELAY)
-
-        if app_info_localizations and "data" in app_info_localizations:
-            with get_db_connection() as conn:
-                cursor = conn.cursor()
-                for loc in app_info_localizations["data"]:
-                    cursor.execute(
-                        """
-                        INSERT OR REPLACE INTO app_info_localizations 
-                        (localization_id, app_id, store_id, locale, name, subtitle, privacy_policy_url, privacy_choices_url) 
-                        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-                        """,
-                        (
-                            loc["id"], app_id, store_id, loc["attributes"].get("locale"),
-                            loc["attributes"].get("name"), loc["attributes"].get("subtitle"),
-                            loc["attributes"].get("privacyPolicyUrl"), loc["attributes"].get("privacyChoicesUrl")
-                        )
-                    )
-                conn.commit()
-
-    # === STEP 4: Fetch & Insert Versions + Localizations (Delete + Insert) ===
-    versions_data = fetch_app_store_versions(app_id, issuer_id, key_id, private_key)
+        app_info = app_info_data["data"][app_info_index]
+        info_locs = included_localizations(app_info, app_info_data, "appInfoLocalizations")
+        if info_locs is None:
+            app_info_localizations = fetch_app_info_localizations(app_info.get("id"), issuer_id, key_id, private_key)
+            throttle()
+            if app_info_localizations and "data" in app_info_localizations:
+                info_locs = app_info_localizations["data"]
+
+        if info_locs is not None:
+            info_rows = [
+                (loc["id"], app_id, store_id, *map(loc["attributes"].get, APP_INFO_LOC_FIELDS))
+                for loc in info_locs
+            ]
+
+    version_rows = []
+    version_loc_rows = []
+    locs_by_version = {}
+    versions_data = fetch_app_store_versions(app_id, issuer_id, key_id, private_key, include_localizations=True)
     if versions_data and "data" in versions_data:
+        for version in versions_data["data"]:
+            included = included_localizations(version, versions_data, "appStoreVersionLocalizations")
+            if included is not None:
+                locs_by_version[version["id"]] = included
+
+        # Versions whose localizations were not embedded are fetched concurrently on the shared listing pool
+        missing = [version["id"] for version in versions_data["data"] if version["id"] not in locs_by_version]
+        if missing:
+            throttle()
+            fetched = map_in_context(
+                _listing_executor, lambda version_id: fetch_app_store_version_localizations(version_id, issuer_id, key_id, private_key),
+                missing
+            )
+            for version_id, version_localizations in zip(missing, fetched):
+                if version_localizations and "data" in version_localizations:
+                    locs_by_version[version_id] = version_localizations["data"]
+
         for version in versions_data["data"]:
             version_id = version["id"]
             platform = version["attributes"].get("platform", "UNKNOWN")
+            version_rows.append((version_id, app_id, store_id, platform))
 
-            # Insert version
-            with get_db_connection() as conn:
-                cursor = conn.cursor()
-                cursor.execute(
-                    "INSERT OR REPLACE INTO app_versions (version_id, app_id, store_id, platform) VALUES (?, ?, ?, ?)",
-                    (version_id, app_id, store_id, platform)
+            version_locs = locs_by_version.get(version_id)
+            if version_locs is not None:
+                version_loc_rows.extend(
+                    (loc["id"], version_id, app_id, store_id, *map(loc["attributes"].get, VERSION_LOC_FIELDS), platform)
+                    for loc in version_locs
                 )
-                conn.commit()
-
-            # Fetch and insert localizations
-            version_localizations = fetch_app_store_version_localizations(version_id, issuer_id, key_id, private_key)
-            time.sleep(REQUEST_DELAY)
-            if version_localizations and "data" in version_localizations:
-                with get_db_connection() as conn:
-                    cursor = conn.cursor()
-                    for loc in version_localizations["data"]:
-                        cursor.execute(
-                            """
-                            INSERT OR REPLACE INTO app_version_localizations 
-                            (localization_id, version_id, app_id, store_id, locale, description, keywords, 
-                            marketing_url, promotional_text, support_url, whats_new, platform) 
-                            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                            """,
-                            (
-                                loc["id"], version_id, app_id, store_id, loc["attributes"].get("locale"),
-                                loc["attributes"].get("description"), loc["attributes"].get("keywords"),
-                                loc["attributes"].get("marketingUrl"), loc["attributes"].get("promotionalText"),
-                                loc["attributes"].get("supportUrl"), loc["attributes"].get("whatsNew"), platform
-                            )
-                        )
-                    conn.commit()
-
-    # === STEP 5: Fetch Screenshots (already deletes old data) ===
-    fetch_screenshots(app_id, store_id, issuer_id, key_id, private_key)
-
-    print(f"Completed fresh sync for app: {app_name} (ID: {app_id})")
-    sync_db_to_github()
-    return app_id, True
+
+    screenshots = None
+    if versions_data and "data" in versions_data:
+        # Reuse the versions and localizations fetched above instead of requesting them again
+        screenshots = collect_screenshots(
+            app_id, store_id, issuer_id, key_id, private_key,
+            versions=versions_data["data"], localizations_by_version=locs_by_version
+        )
+
+    return {
+        "app_id": app_id, "app_name": app_name, "store_id": store_id,
+        "info_rows": info_rows, "version_rows": version_rows,
+        "version_loc_rows": version_loc_rows, "screenshots": screenshots or [],
+    }
+
+def store_app_rows(rows):
+    """DB half of process_app: replaces all of one app's rows in ONE transaction."""
+    app_id, app_name, store_id = rows["app_id"], rows["app_name"], rows["store_id"]
+    info_rows, version_rows, version_loc_rows = rows["info_rows"], rows["version_rows"], rows["version_loc_rows"]
+    log.debug("[SYNC] Replacing data for app %s...", app_id)
+    scope = "app_id = ? AND store_id = ?"
+    with DB_WRITE_LOCK, get_db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute(
+            "INSERT INTO apps (app_id, store_id, name) VALUES (?, ?, ?)" + upsert_clause(("app_id", "store_id", "name")),
+            (app_id, store_id, app_name)
+        )
+        # Upsert in place, then drop only what Apple no longer returns (unchanged rows are not rewritten)
+        cursor.executemany(INSERT_SQL["app_info_localizations"], info_rows)
+        cursor.executemany(INSERT_SQL["app_versions"], version_rows)
+        cursor.executemany(INSERT_SQL["app_version_localizations"], version_loc_rows)
+        delete_missing_rows(cursor, "app_info_localizations", "localization_id", [r[0] for r in info_rows], scope, (app_id, store_id))
+        delete_missing_rows(cursor, "app_versions", "version_id", [r[0] for r in version_rows], scope, (app_id, store_id))
+        delete_missing_rows(cursor, "app_version_localizations", "localization_id", [r[0] for r in version_loc_rows], scope, (app_id, store_id))
+        store_screenshots(cursor, app_id, store_id, rows["screenshots"])
+        conn.commit()
+    log.debug("[SYNC] Stored %d app info / %d version localization(s) for app %s.", len(info_rows), len(version_loc_rows), app_id)
+
+def process_app(app, store_id, issuer_id, key_id, private_key):
+    rows = collect_app_rows(app, store_id, issuer_id, key_id, private_key)
+    store_app_rows(rows)
+    log.info("Completed fresh sync for app: %s (ID: %s)", rows['app_name'], rows['app_id'])
+    return rows["app_id"], True
 
 # -------------------------------------------------
 # NEW: fetch & store data for ONE app only (DELETE OLD FIRST)
@@ -924,7 +1326,16 @@ def fetch_and_store_single_app(app_id, store_id, issuer_id, key_id, private_key)
         cur = conn.cursor()
         cur.execute("SELECT name FROM apps WHERE app_id = ? AND store_id = ?", (app_id, store_id))
         row = cur.fetchone()
-        app_name = row[0] if row else "Unknown"
+    app_name = row[0] if row else None
+    if not app_name:
+        # Not stored yet: ask Apple rather than saving the app as "Unknown"
+        token = generate_jwt(issuer_id, key_id, private_key)
+        try:
+            app_data = get(f"{BASE_URL}/apps/{app_id}", token, {"fields[apps]": "name"}) if token else None
+        except AppleAPIError as e:
+            print(f"[SYNC SINGLE] Could not look up app name: {e}")
+            app_data = None
+        app_name = (app_data or {}).get("data", {}).get("attributes", {}).get("name") or "Unknown"
 
     print(f"[SYNC SINGLE] Starting FULL refresh for app {app_name} (ID: {app_id}) …")
 
@@ -936,7 +1347,6 @@ def fetch_and_store_single_app(app_id, store_id, issuer_id, key_id, private_key)
         _, success = process_app(dummy_app, store_id, issuer_id, key_id, private_key)
         if success:
             print(f"[SYNC SINGLE] App {app_name} refreshed 100% fresh.")
-            sync_db_to_github()
         else:
             print(f"[SYNC SINGLE] Failed.")
         return success
@@ -955,30 +1365,57 @@ def fetch_and_store_apps(store_id, issuer_id, key_id, private_key):
         return False
 
     current_app_ids = [app.get("id") for app in apps]
-    success_count = 0
+    stored = []
 
-    for app in apps:
-        try:
-            app_id, success = process_app(app, store_id, issuer_id, key_id, private_key)
-            if success:
-                success_count += 1
-        except Exception as e:
-            print(f"Error processing app {app.get('id')}: {e}")
+    # APP_WORKERS fetchers do the HTTP; one writer thread owns every SQLite write, so they never contend.
+    # The queue is bounded so fetchers wait instead of piling up rows when the writer falls behind.
+    write_q = queue.Queue(maxsize=APP_WORKERS * 2)
+
+    def writer():
+        while (rows := write_q.get()) is not None:
+            try:
+                store_app_rows(rows)
+                stored.append(rows["app_id"])
+                log.info("Completed fresh sync for app: %s (ID: %s)", rows['app_name'], rows['app_id'])
+            except Exception as e:
+                log.error("Error storing app %s: %s", rows['app_id'], e)
+
+    def fetcher(app):
+        write_q.put(collect_app_rows(app, store_id, issuer_id, key_id, private_key))
+
+    writer_thread = threading.Thread(target=writer, daemon=True)
+    writer_thread.start()
+    try:
+        with cached_gets((issuer_id, key_id)), ThreadPoolExecutor(max_workers=APP_WORKERS) as executor:
+            futures = {submit_in_context(executor, fetcher, app): app for app in apps}
+            for future in as_completed(futures):
+                try:
+                    future.result()
+                except Exception as e:
+                    log.error("Error processing app %s: %s", futures[future].get('id'), e)
+    finally:
+        write_q.put(None)
+        writer_thread.join()
+    success_count = len(stored)
 
     # === CLEANUP: Remove data of apps no longer in Apple Store ===
+    removed = 0
     if current_app_ids:
         print(f"[CLEANUP] Removing data for deleted apps in store {store_id}...")
-        with get_db_connection() as conn:
+        with DB_WRITE_LOCK, get_db_connection() as conn:
             cursor = conn.cursor()
-            placeholders = ','.join('?' for _ in current_app_ids)
+            changes_before = conn.total_changes
             for table in ['app_screenshots', 'app_version_localizations', 'app_versions', 'app_info_localizations', 'apps']:
-                query = f"DELETE FROM {table} WHERE store_id = ? AND app_id NOT IN ({placeholders})"
-                cursor.execute(query, (store_id, *current_app_ids))
+                delete_missing_rows(cursor, table, "app_id", current_app_ids, "store_id = ?", (store_id,))
+            removed = conn.total_changes - changes_before
             conn.commit()
+            # Refresh the query planner's statistics, but only for tables whose stats went stale
+            cursor.execute("PRAGMA optimize")
         print(f"[CLEANUP] Done. Only current apps remain.")
 
     print(f"Successfully synced {success_count}/{len(apps)} apps.")
-    sync_db_to_github()
+    if success_count or removed:
+        schedule_db_sync()  # nothing written means nothing to push
     return success_count > 0
 
 if __name__ == "__main__":